@@ -1,13 +1,22 @@
 import asyncio
-import base64
-import json
+import binascii
 import logging
-import struct
+import sys
+import time
+from collections import deque
 from dataclasses import dataclass, field
 from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple
 
+import numpy as np
+import orjson
 import websockets
 
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from geo import bounds_mask, classify
+
 logger = logging.getLogger(__name__)
 
 # This interceptor was an attempt to parse e-way data dur to their missing response for API keys mail request.
@@ -34,32 +43,33 @@ FOUND_REGIONS_BOUNDS = [
 ]
 
 
-@dataclass
-class GpsCoordinate:
-    latitude: float
-    longitude: float
-    timestamp: str
-    offset: int
-
-    def is_in_bounds(self, bounds: tuple[float, float, float, float]) -> bool:
-        lat_min, lat_max, lng_min, lng_max = bounds
-        return (
-            lat_min <= self.latitude <= lat_max and lng_min <= self.longitude <= lng_max
-        )
-
-    def is_in_kyiv(self) -> bool:
-        return self.is_in_bounds(KYIV_BOUNDS)
+class Positions(NamedTuple):
+    """Structure-of-arrays batch of GPS positions sharing one receive timestamp."""
 
-    def is_in_ukraine(self) -> bool:
-        return self.is_in_bounds(UKRAINE_BOUNDS)
+    latitude: np.ndarray
+    longitude: np.ndarray
+    offset: np.ndarray
+    timestamp: str
 
-    def to_dict(self) -> dict:
-        return {
-            "latitude": self.latitude,
-            "longitude": self.longitude,
-            "timestamp": self.timestamp,
-            "offset": self.offset,
-        }
+    @property
+    def size(self) -> int:
+        return int(self.latitude.size)
+
+    def to_dicts(self, mask: np.ndarray | None = None) -> list[dict]:
+        latitude = self.latitude if mask is None else self.latitude[mask]
+        longitude = self.longitude if mask is None else self.longitude[mask]
+        offset = self.offset if mask is None else self.offset[mask]
+        return [
+            {
+                "latitude": lat,
+                "longitude": lng,
+                "timestamp": self.timestamp,
+                "offset": off,
+            }
+            for lat, lng, off in zip(
+                latitude.tolist(), longitude.tolist(), offset.tolist()
+            )
+        ]
 
 
 @dataclass
@@ -83,80 +93,95 @@ class CategorizedPositions:
     other: list[dict] = field(default_factory=list)
 
 
-def is_valid_coordinate(latitude: float, longitude: float) -> bool:
-    return -90 <= latitude <= 90 and -180 <= longitude <= 180
+# Region bounds unpacked into (R, 2) lookup tables for vectorized matching
+_REGION_LAT = np.array([lat for lat, _, _ in FOUND_REGIONS_BOUNDS], dtype=np.float64)
+_REGION_LON = np.array([lon for _, lon, _ in FOUND_REGIONS_BOUNDS], dtype=np.float64)
+_REGION_NAMES = [name for _, _, name in FOUND_REGIONS_BOUNDS]
+UNKNOWN_REGION = "Unknown region"
 
 
 def identify_region(latitude: float, longitude: float) -> str:
     for (lat_min, lat_max), (lng_min, lng_max), region_name in FOUND_REGIONS_BOUNDS:
         if lat_min <= latitude <= lat_max and lng_min <= longitude <= lng_max:
             return region_name
-    return "Unknown region"
+    return UNKNOWN_REGION
 
 
-def decode_base64_message(message: str) -> bytes | None:
-    padding_needed = 4 - (len(message) % 4)
-    if padding_needed != 4:
-        message += "=" * padding_needed
+def identify_region_batch(latitude: np.ndarray, longitude: np.ndarray) -> list[str]:
+    hits = (
+        (latitude[:, None] >= _REGION_LAT[:, 0])
+        & (latitude[:, None] <= _REGION_LAT[:, 1])
+        & (longitude[:, None] >= _REGION_LON[:, 0])
+        & (longitude[:, None] <= _REGION_LON[:, 1])
+    )
+    first_hit = hits.argmax(axis=1)
+    return [
+        _REGION_NAMES[index] if hit else UNKNOWN_REGION
+        for index, hit in zip(first_hit.tolist(), hits.any(axis=1).tolist())
+    ]
+
 
+def decode_base64_message(message: str) -> bytes | None:
+    # a2b_base64 tolerates over-padding, so a fixed suffix replaces the
+    # per-message length/modulo padding computation.
     try:
-        return base64.b64decode(message)
-    except ValueError as error:
+        return binascii.a2b_base64(message + "===")
+    except binascii.Error as error:
         logger.warning(f"Base64 decode error: {error}")
         return None
 
 
-def extract_coordinates_from_binary(data: bytes) -> list[GpsCoordinate]:
-    coordinates = []
-    timestamp = datetime.now().isoformat()
+def extract_coordinates_from_binary(data: bytes) -> Positions | None:
+    trimmed = len(data) - (len(data) % COORDINATE_STRUCT_SIZE)
+    if trimmed == 0:
+        return None
 
-    for offset in range(
-        0, len(data) - (COORDINATE_STRUCT_SIZE - 1), COORDINATE_STRUCT_SIZE
-    ):
-        try:
-            lng_raw, lat_raw = struct.unpack(
-                "<II", data[offset : offset + COORDINATE_STRUCT_SIZE]
-            )
-        except struct.error:
-            break
+    timestamp = datetime.now().isoformat()
 
-        longitude = lng_raw / GPS_COORDINATE_SCALE_FACTOR
-        latitude = lat_raw / GPS_COORDINATE_SCALE_FACTOR
+    # memoryview slicing keeps the trim zero-copy; bytes slicing would
+    # duplicate the whole payload before frombuffer wraps it.
+    raw = np.frombuffer(memoryview(data)[:trimmed], dtype=np.dtype("<u4")).reshape(
+        -1, 2
+    )
+    longitude = raw[:, 0] * (1.0 / GPS_COORDINATE_SCALE_FACTOR)
+    latitude = raw[:, 1] * (1.0 / GPS_COORDINATE_SCALE_FACTOR)
 
-        if not is_valid_coordinate(latitude, longitude):
-            continue
+    valid = (
+        (latitude >= -90) & (latitude <= 90) & (longitude >= -180) & (longitude <= 180)
+    )
+    if not valid.any():
+        return None
 
-        coordinates.append(
-            GpsCoordinate(
-                latitude=latitude,
-                longitude=longitude,
-                timestamp=timestamp,
-                offset=offset,
-            )
-        )
+    return Positions(
+        latitude=latitude[valid],
+        longitude=longitude[valid],
+        offset=np.flatnonzero(valid) * COORDINATE_STRUCT_SIZE,
+        timestamp=timestamp,
+    )
 
-    return coordinates
 
+def categorize_positions(
+    positions: Positions, result: CategorizedPositions | None = None
+) -> CategorizedPositions:
+    if result is None:
+        result = CategorizedPositions()
 
-def categorize_positions(positions: list[GpsCoordinate]) -> CategorizedPositions:
-    result = CategorizedPositions()
+    category = classify(
+        positions.latitude, positions.longitude, KYIV_BOUNDS, UKRAINE_BOUNDS
+    )
 
-    for position in positions:
-        position_dict = position.to_dict()
-        if position.is_in_kyiv():
-            result.kyiv.append(position_dict)
-        elif position.is_in_ukraine():
-            result.ukraine.append(position_dict)
-        else:
-            result.other.append(position_dict)
+    for code, bucket in enumerate((result.kyiv, result.ukraine, result.other)):
+        bucket.extend(positions.to_dicts(category == code))
 
     return result
 
 
 class LiveEasyWayClient:
     def __init__(self):
-        self.positions: list[GpsCoordinate] = []
         self.stats = CollectionStats()
+        self.category_counts = {"kyiv": 0, "ukraine": 0, "other": 0}
+        self._output_filename: str | None = None
+        self._output_file = None
 
     async def connect_and_listen(
         self, duration_minutes: int = DEFAULT_LISTEN_DURATION_MINUTES
@@ -165,33 +190,73 @@ class LiveEasyWayClient:
         logger.info(f"Will listen for {duration_minutes} minutes")
         logger.debug(f"URL: {EASYWAY_WEBSOCKET_URL}")
 
+        self._open_output_file()
         try:
-            async with websockets.connect(EASYWAY_WEBSOCKET_URL) as websocket:
+            # Payloads are base64/binary GPS blobs: permessage-deflate buys
+            # nothing and just burns CPU on every frame.
+            async with websockets.connect(
+                EASYWAY_WEBSOCKET_URL, compression=None, max_size=2**22
+            ) as websocket:
                 await self._listen_for_messages(websocket, duration_minutes)
         except Exception as error:
             self._log_connection_error(error)
+        finally:
+            self._close_output_file()
+
+    def _open_output_file(self) -> None:
+        self._output_filename = (
+            f"kyiv_transport_live_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+        )
+        self._output_file = open(self._output_filename, "ab")
+        logger.info(f"Streaming positions to: {self._output_filename}")
+
+    def _close_output_file(self) -> None:
+        if self._output_file is not None:
+            self._output_file.close()
+            self._output_file = None
 
     async def _listen_for_messages(self, websocket, duration_minutes: int):
         logger.info("Connected successfully")
-        end_time = datetime.now().timestamp() + (duration_minutes * 60)
-        message_count = 0
+        deadline = time.monotonic() + duration_minutes * 60
+        pending: deque = deque()
+        wakeup = asyncio.Event()
 
-        while datetime.now().timestamp() < end_time:
-            try:
-                message = await asyncio.wait_for(
-                    websocket.recv(), timeout=MESSAGE_TIMEOUT_SECONDS
-                )
-                message_count += 1
-                logger.info(f"Message #{message_count} received ({len(message)} chars)")
-                self._process_message(message)
+        async def _receive() -> None:
+            while True:
+                pending.append(await websocket.recv())
+                wakeup.set()
 
-            except asyncio.TimeoutError:
-                logger.warning(
-                    f"No message in {MESSAGE_TIMEOUT_SECONDS:.0f} seconds..."
-                )
-            except websockets.exceptions.ConnectionClosed:
-                logger.warning("Connection closed by server")
-                break
+        receiver = asyncio.create_task(_receive())
+        try:
+            while time.monotonic() < deadline:
+                try:
+                    await asyncio.wait_for(
+                        wakeup.wait(), timeout=MESSAGE_TIMEOUT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    if receiver.done():
+                        logger.warning("Connection closed by server")
+                        break
+                    logger.warning(
+                        f"No message in {MESSAGE_TIMEOUT_SECONDS:.0f} seconds..."
+                    )
+                    continue
+
+                wakeup.clear()
+                batch = list(pending)
+                pending.clear()
+                logger.info(f"Received batch of {len(batch)} messages")
+                self._process_message_batch(batch)
+
+                if receiver.done():
+                    logger.warning("Connection closed by server")
+                    break
+        finally:
+            receiver.cancel()
+            try:
+                await receiver
+            except (asyncio.CancelledError, websockets.exceptions.ConnectionClosed):
+                pass
 
         logger.info(f"Finished after {duration_minutes} minutes")
         self.save_results()
@@ -200,102 +265,122 @@ class LiveEasyWayClient:
         logger.error(f"Connection error: {error}")
         logger.debug(f"Error msg: {str(error).lower()}")
 
-    def _process_message(self, message):
-        self.stats.messages += 1
-        coordinates = self._extract_coordinates(message)
+    def _process_message_batch(self, messages: list) -> None:
+        blobs = []
+        for message in messages:
+            self.stats.messages += 1
+            blob = self._decode_message(message)
+            if blob:
+                blobs.append(blob)
 
-        if not coordinates:
+        if not blobs:
+            return
+
+        # One vectorized extraction over the concatenated payloads; record
+        # offsets are relative to the joined batch buffer.
+        positions = extract_coordinates_from_binary(b"".join(blobs))
+        if positions is None:
             logger.debug("No valid coordinates found")
             return
 
-        self.stats.coordinates += len(coordinates)
-        logger.info(f"Found {len(coordinates)} GPS coordinates")
-        self._log_coordinate_findings(coordinates)
-        self.positions.extend(coordinates)
+        self.stats.coordinates += positions.size
+        logger.info(f"Found {positions.size} GPS coordinates")
+        self._log_coordinate_findings(positions)
+        self._write_positions(positions)
 
-    def _extract_coordinates(self, message) -> list[GpsCoordinate]:
+    def _decode_message(self, message) -> bytes | None:
         if isinstance(message, bytes):
             logger.debug(f"Binary message received ({len(message)} bytes)")
-            return extract_coordinates_from_binary(message)
+            return message
 
         logger.debug(f"Text message: {message[:100]}...")
 
         if len(message) < MIN_BASE64_MESSAGE_LENGTH:
-            return []
+            return None
 
         decoded = decode_base64_message(message)
-        if decoded is None:
-            return []
-
-        logger.debug(f"Decoded to {len(decoded)} bytes")
-        return extract_coordinates_from_binary(decoded)
+        if decoded is not None:
+            logger.debug(f"Decoded to {len(decoded)} bytes")
+        return decoded
+
+    def _log_coordinate_findings(self, positions: Positions):
+        in_kyiv = bounds_mask(positions.latitude, positions.longitude, KYIV_BOUNDS)
+        in_ukraine = bounds_mask(
+            positions.latitude, positions.longitude, UKRAINE_BOUNDS
+        )
 
-    def _log_coordinate_findings(self, coordinates: list[GpsCoordinate]):
-        kyiv_coords = [c for c in coordinates if c.is_in_kyiv()]
-        ukraine_coords = [
-            c for c in coordinates if c.is_in_ukraine() and not c.is_in_kyiv()
-        ]
-        other_coords = [c for c in coordinates if not c.is_in_ukraine()]
-
-        if kyiv_coords:
-            self.stats.kyiv_found += len(kyiv_coords)
-            logger.info(f"KYIV FOUND: {len(kyiv_coords)} vehicles!")
-            for coord in kyiv_coords:
-                logger.info(f"  {coord.latitude:.6f}N, {coord.longitude:.6f}E")
-
-        elif ukraine_coords:
-            logger.info(f"UKRAINE: {len(ukraine_coords)} vehicles found")
-            for coord in ukraine_coords[:3]:
-                logger.info(f"  {coord.latitude:.6f}N, {coord.longitude:.6f}E")
-
-        if other_coords:
-            logger.debug(f"Other regions: {len(other_coords)} coordinates")
-            for coord in other_coords[:2]:
-                region = identify_region(coord.latitude, coord.longitude)
-                logger.debug(
-                    f"  {coord.latitude:.5f}N, {coord.longitude:.5f}E ({region})"
+        kyiv_count = int(in_kyiv.sum())
+        ukraine_count = int((in_ukraine & ~in_kyiv).sum())
+        other_count = positions.size - int(in_ukraine.sum())
+
+        if kyiv_count:
+            self.stats.kyiv_found += kyiv_count
+            if logger.isEnabledFor(logging.INFO):
+                listing = "\n".join(
+                    f"  {lat:.6f}N, {lng:.6f}E"
+                    for lat, lng in zip(
+                        positions.latitude[in_kyiv].tolist(),
+                        positions.longitude[in_kyiv].tolist(),
+                    )
+                )
+                logger.info("KYIV FOUND: %d vehicles!\n%s", kyiv_count, listing)
+
+        elif ukraine_count and logger.isEnabledFor(logging.INFO):
+            ukraine_only = in_ukraine & ~in_kyiv
+            listing = "\n".join(
+                f"  {lat:.6f}N, {lng:.6f}E"
+                for lat, lng in zip(
+                    positions.latitude[ukraine_only][:3].tolist(),
+                    positions.longitude[ukraine_only][:3].tolist(),
+                )
+            )
+            logger.info("UKRAINE: %d vehicles found\n%s", ukraine_count, listing)
+
+        if other_count and logger.isEnabledFor(logging.DEBUG):
+            outside = ~in_ukraine
+            sample_lat = positions.latitude[outside][:2]
+            sample_lng = positions.longitude[outside][:2]
+            regions = identify_region_batch(sample_lat, sample_lng)
+            listing = "\n".join(
+                f"  {lat:.5f}N, {lng:.5f}E ({region})"
+                for lat, lng, region in zip(
+                    sample_lat.tolist(), sample_lng.tolist(), regions
                 )
+            )
+            logger.debug("Other regions: %d coordinates\n%s", other_count, listing)
+
+    def _write_positions(self, positions: Positions) -> None:
+        assert self._output_file is not None
+
+        categorized = categorize_positions(positions)
+        lines = bytearray()
+        for category, bucket in (
+            ("kyiv", categorized.kyiv),
+            ("ukraine", categorized.ukraine),
+            ("other", categorized.other),
+        ):
+            self.category_counts[category] += len(bucket)
+            for position in bucket:
+                position["category"] = category
+                lines += orjson.dumps(position)
+                lines += b"\n"
+
+        self._output_file.write(lines)
+        self._output_file.flush()
 
     def save_results(self):
-        if not self.positions:
+        if not self.stats.coordinates:
             logger.warning("No data collected")
             return
+        self._log_summary()
 
-        categorized = categorize_positions(self.positions)
-        filename = (
-            f"kyiv_transport_live_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        )
-        output_data = self._build_output_data(categorized)
-
-        with open(filename, "w") as file:
-            json.dump(output_data, file, indent=2)
-
-        self._log_summary(filename, categorized)
-
-    def _build_output_data(self, categorized: CategorizedPositions) -> dict:
-        return {
-            "collection_info": {
-                "timestamp": datetime.now().isoformat(),
-                "statistics": self.stats.to_dict(),
-            },
-            "summary": {
-                "total_positions": len(self.positions),
-                "kyiv_positions": len(categorized.kyiv),
-                "ukraine_positions": len(categorized.ukraine),
-                "other_positions": len(categorized.other),
-            },
-            "kyiv_vehicles": categorized.kyiv,
-            "ukraine_vehicles": categorized.ukraine,
-            "other_vehicles": categorized.other[:100],
-        }
-
-    def _log_summary(self, filename: str, categorized: CategorizedPositions):
-        logger.info(f"Results saved to: {filename}")
+    def _log_summary(self):
+        logger.info(f"Results saved to: {self._output_filename}")
         logger.info(f"Messages received: {self.stats.messages}")
-        logger.info(f"Total coordinates: {len(self.positions)}")
-        logger.info(f"Kyiv vehicles: {len(categorized.kyiv)}")
-        logger.info(f"Ukraine vehicles: {len(categorized.ukraine)}")
-        logger.info(f"Other regions: {len(categorized.other)}")
+        logger.info(f"Total coordinates: {self.stats.coordinates}")
+        logger.info(f"Kyiv vehicles: {self.category_counts['kyiv']}")
+        logger.info(f"Ukraine vehicles: {self.category_counts['ukraine']}")
+        logger.info(f"Other regions: {self.category_counts['other']}")
 
 
 async def main():
@@ -312,6 +397,13 @@ if __name__ == "__main__":
         level=logging.INFO,
         format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     )
+    if sys.platform != "win32":
+        try:
+            import uvloop
+
+            uvloop.install()
+        except ImportError:
+            pass
     websockets_version = getattr(websockets, "__version__", "unknown")
     logger.info(f"Using websockets version: {websockets_version}")
     asyncio.run(main())
@@ -0,0 +1,36 @@
+"""Shared vectorized geographic classification for the ingestion pipelines."""
+
+import numpy as np
+
+# (latitude_min, latitude_max, longitude_min, longitude_max)
+Bounds = tuple[float, float, float, float]
+
+# Category codes produced by classify()
+INNER = 0
+OUTER = 1
+OTHER = 2
+
+
+def bounds_mask(
+    latitude: np.ndarray, longitude: np.ndarray, bounds: Bounds
+) -> np.ndarray:
+    lat_min, lat_max, lng_min, lng_max = bounds
+    return (
+        (latitude >= lat_min)
+        & (latitude <= lat_max)
+        & (longitude >= lng_min)
+        & (longitude <= lng_max)
+    )
+
+
+def classify(
+    latitude: np.ndarray, longitude: np.ndarray, inner: Bounds, outer: Bounds
+) -> np.ndarray:
+    """Three-way classification of coordinate arrays against nested bounds.
+
+    Returns an int array with INNER for points inside ``inner``, OUTER for
+    points inside ``outer`` only, and OTHER for everything else.
+    """
+    in_inner = bounds_mask(latitude, longitude, inner)
+    in_outer = bounds_mask(latitude, longitude, outer)
+    return np.where(in_inner, INNER, np.where(in_outer, OUTER, OTHER))
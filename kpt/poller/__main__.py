@@ -37,4 +37,11 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
+    if sys.platform != "win32":
+        try:
+            import uvloop
+
+            uvloop.install()
+        except ImportError:
+            pass
     asyncio.run(main())
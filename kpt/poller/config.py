@@ -3,19 +3,18 @@ from __future__ import annotations
 import functools
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Mapping
+from typing import Any, Callable
 
 from dotenv import dotenv_values
 
 
 @functools.lru_cache(maxsize=1)
-def load_environment() -> Mapping[str, str | None]:
-    return dotenv_values()
+def load_environment() -> dict[str, str | None]:
+    return dict(dotenv_values())
 
 
 def get_env(key: str, default: str) -> str:
-    env = load_environment()
-    return env.get(key) or default
+    return load_environment().get(key, default) or default
 
 
 def get_env_int(key: str, default: int) -> int:
@@ -42,6 +41,20 @@ class KyivCoordinateBounds:
             self.lat_min <= lat <= self.lat_max and self.lon_min <= lon <= self.lon_max
         )
 
+    def as_predicate(self) -> Callable[[float, float], bool]:
+        """Return a closure with the bounds captured as locals.
+
+        Per-coordinate callers avoid the four attribute loads that
+        `contains` pays on every call.
+        """
+        lat_min, lat_max = self.lat_min, self.lat_max
+        lon_min, lon_max = self.lon_min, self.lon_max
+
+        def contains(lat: float, lon: float) -> bool:
+            return lat_min <= lat <= lat_max and lon_min <= lon <= lon_max
+
+        return contains
+
 
 @dataclass(frozen=True, slots=True)
 class WebSocketConfig:
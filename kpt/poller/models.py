@@ -1,11 +1,11 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
-from datetime import datetime
 from typing import Any, Self
 
 
-@dataclass(frozen=True, slots=True)
+@dataclass(slots=True)
 class VehiclePosition:
     vehicle_id: int
     route_id: int
@@ -28,14 +28,21 @@ class VehiclePosition:
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> Self:
+        vehicle_id = data.get("vehicle_id")
+        if vehicle_id is None:
+            vehicle_id = data.get("id", 0)
+        route_id = data.get("route_id")
+        if route_id is None:
+            route_id = data.get("routeId", 0)
+        timestamp = data.get("timestamp")
         return cls(
-            vehicle_id=int(data.get("vehicle_id") or data.get("id", 0)),
-            route_id=int(data.get("route_id") or data.get("routeId", 0)),
+            vehicle_id=int(vehicle_id),
+            route_id=int(route_id),
             lat=float(data["lat"]),
             lon=float(data["lon"]),
             direction=int(data.get("direction", 0)),
             flag=int(data.get("flag", 0)),
-            timestamp=int(data.get("timestamp") or int(datetime.now().timestamp())),
+            timestamp=int(timestamp) if timestamp is not None else int(time.time()),
         )
 
 
@@ -75,13 +82,3 @@ class PollerStats:
     polls_failed: int = 0
     total_positions: int = 0
     ws_flush_count: int = 0
-
-    def record_poll_success(self) -> None:
-        self.poll_count += 1
-
-    def record_poll_failure(self) -> None:
-        self.polls_failed += 1
-
-    def record_position_flush(self, count: int) -> None:
-        self.ws_flush_count += 1
-        self.total_positions += count
@@ -1,15 +1,19 @@
 from __future__ import annotations
 
-import functools
-import json
 import re
 from typing import TYPE_CHECKING, Any
 
+import orjson
+
 from .models import VehiclePosition
 
 if TYPE_CHECKING:
+    from collections.abc import Callable
+
     from .config import KyivCoordinateBounds
 
+    BoundsPredicate = Callable[[float, float], bool]
+
 # Pre-compiled regex for Socket.IO event messages
 SOCKET_IO_EVENT_PATTERN = re.compile(r'^42\["(\w+)",(.*)]\s*$', re.DOTALL)
 
@@ -22,7 +26,7 @@ class PositionParseError(Exception):
 
 
 def parse_csv_position(
-    data: str, bounds: KyivCoordinateBounds | None = None
+    data: str, contains: BoundsPredicate | None = None
 ) -> VehiclePosition | None:
     """
     Parse CSV vehicle position string.
@@ -37,7 +41,7 @@ def parse_csv_position(
         lat = float(parts[2])
         lon = float(parts[3])
 
-        if bounds is not None and not bounds.contains(lat, lon):
+        if contains is not None and not contains(lat, lon):
             return None
 
         return VehiclePosition(
@@ -49,40 +53,110 @@ def parse_csv_position(
             flag=int(parts[5]),
             timestamp=int(parts[6]),
         )
-    except (ValueError, IndexError):
+    except ValueError:
+        # IndexError is impossible after the field-count check above.
         return None
 
 
+def parse_csv_positions_batch(
+    lines: list[str], contains: BoundsPredicate | None = None
+) -> list[VehiclePosition]:
+    """Parse a batch of CSV position strings in one pass.
+
+    Conversions and the bounds predicate are hoisted into locals so each
+    row pays only for split/convert, not per-row function dispatch.
+    """
+    positions: list[VehiclePosition] = []
+    append = positions.append
+    to_float = float
+    to_int = int
+
+    for data in lines:
+        parts = data.split(",")
+        if len(parts) != CSV_POSITION_FIELD_COUNT:
+            continue
+
+        try:
+            lat = to_float(parts[2])
+            lon = to_float(parts[3])
+
+            if contains is not None and not contains(lat, lon):
+                continue
+
+            append(
+                VehiclePosition(
+                    vehicle_id=to_int(parts[0]),
+                    route_id=to_int(parts[1]),
+                    lat=lat,
+                    lon=lon,
+                    direction=to_int(parts[4]),
+                    flag=to_int(parts[5]),
+                    timestamp=to_int(parts[6]),
+                )
+            )
+        except ValueError:
+            continue
+
+    return positions
+
+
 def parse_socket_io_event(message: str) -> tuple[str, Any] | None:
     """
     Parse Socket.IO event message.
     Format: 42["event_name", payload]
+
+    The happy path is plain string ops on the fixed frame layout; the
+    compiled regex only runs as a fallback for unusual framing.
     """
+    if not message.startswith('42["'):
+        return None
+
+    name_end = message.find('",', 4)
+    if name_end == -1:
+        return _parse_socket_io_event_regex(message)
+
+    stripped = message.rstrip()
+    if not stripped.endswith("]"):
+        return _parse_socket_io_event_regex(message)
 
+    try:
+        payload = orjson.loads(stripped[name_end + 2 : -1])
+        return message[4:name_end], payload
+    except orjson.JSONDecodeError:
+        return _parse_socket_io_event_regex(message)
+
+
+def _parse_socket_io_event_regex(message: str) -> tuple[str, Any] | None:
     match = SOCKET_IO_EVENT_PATTERN.match(message)
     if not match:
         return None
 
     try:
         event_name = match.group(1)
-        payload = json.loads(match.group(2))
+        payload = orjson.loads(match.group(2))
         return event_name, payload
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         return None
 
 
 def extract_positions_from_payload(
-    payload: Any, bounds: KyivCoordinateBounds | None = None
+    payload: Any, contains: BoundsPredicate | None = None
 ) -> list[VehiclePosition]:
     positions: list[VehiclePosition] = []
 
     if isinstance(payload, list):
+        csv_lines: list[str] = []
         for item in payload:
-            position = _extract_single_position(item, bounds)
-            if position:
-                positions.append(position)
+            if isinstance(item, str):
+                csv_lines.append(item)
+            else:
+                position = _extract_single_position(item, contains)
+                if position:
+                    positions.append(position)
+        if csv_lines:
+            positions.extend(parse_csv_positions_batch(csv_lines, contains))
     elif isinstance(payload, str):
-        position = parse_csv_position(payload, bounds)
+        position = parse_csv_position(payload, contains)
         if position:
             positions.append(position)
 
@@ -90,14 +164,14 @@ def extract_positions_from_payload(
 
 
 def _extract_single_position(
-    item: Any, bounds: KyivCoordinateBounds | None
+    item: Any, contains: BoundsPredicate | None
 ) -> VehiclePosition | None:
     if isinstance(item, str):
-        return parse_csv_position(item, bounds)
+        return parse_csv_position(item, contains)
     elif isinstance(item, dict) and "lat" in item:
         try:
             position = VehiclePosition.from_dict(item)
-            if bounds is None or bounds.contains(position.lat, position.lon):
+            if contains is None or contains(position.lat, position.lon):
                 return position
         except (KeyError, ValueError, TypeError):
             pass
@@ -107,20 +181,18 @@ def _extract_single_position(
 POSITION_EVENT_NAMES = frozenset({"locations", "vehicles", "positions", "v"})
 
 
-@functools.lru_cache(maxsize=128)
-def is_position_event(event_name: str) -> bool:
-    return event_name in POSITION_EVENT_NAMES
-
-
 class MessageParser:
     def __init__(self, bounds: KyivCoordinateBounds | None = None) -> None:
         self.bounds = bounds
+        # Specialized once at construction: the closure carries the four
+        # bound floats as locals, so per-row checks skip attribute loads.
+        self._contains = bounds.as_predicate() if bounds is not None else None
 
     def parse(self, message: str) -> list[VehiclePosition]:
         positions: list[VehiclePosition] = []
 
         # try CSV
-        csv_position = parse_csv_position(message, self.bounds)
+        csv_position = parse_csv_position(message, self._contains)
         if csv_position:
             return [csv_position]
 
@@ -128,8 +200,8 @@ class MessageParser:
         event = parse_socket_io_event(message)
         if event:
             event_name, payload = event
-            if is_position_event(event_name):
-                positions = extract_positions_from_payload(payload, self.bounds)
+            if event_name in POSITION_EVENT_NAMES:
+                positions = extract_positions_from_payload(payload, self._contains)
 
         return positions
 
@@ -146,10 +218,21 @@ def parse_handshake_response(text: str) -> tuple[str | None, int | None]:
 
     try:
         json_start = text.index(":0{") + 2
-        json_str = _extract_json_object(text[json_start:])
-        data = json.loads(json_str)
+        tail = text[json_start:]
+
+        # Handshake JSON has no braces inside strings, so the last '}'
+        # closes the object; the char-by-char scan is only the fallback
+        # for responses with trailing packets containing braces.
+        end = tail.rfind("}")
+        if end != -1:
+            try:
+                data = orjson.loads(tail[: end + 1])
+            except orjson.JSONDecodeError:
+                data = orjson.loads(_extract_json_object(tail))
+        else:
+            data = orjson.loads(_extract_json_object(tail))
         return data.get("sid"), data.get("pingInterval")
-    except (ValueError, json.JSONDecodeError):
+    except (ValueError, orjson.JSONDecodeError):
         return None, None
 
 
@@ -4,7 +4,6 @@ import asyncio
 import logging
 import signal
 import time
-from datetime import datetime
 
 from .config import PollerConfig
 from .models import PollerStats, RouteRecord
@@ -14,7 +13,7 @@ from .websocket_client import (
     ConcurrentFileQueue,
     DeduplicationFilter,
 )
-from .writer import StreamWriter
+from .writer import StreamWriter, iso_timestamp
 
 logger = logging.getLogger(__name__)
 
@@ -24,14 +23,14 @@ class KPTPoller:
         self.config = config
         self._stats = PollerStats()
         self._start_time = time.monotonic()
-        self._running = False
+        self._stop_event = asyncio.Event()
 
     async def run(self) -> None:
         self._log_config()
-        self._running = True
+        self._stop_event.clear()
         backoff_delay = self.config.retry.base_delay
 
-        while self._running:
+        while not self._stop_event.is_set():
             try:
                 async with AsyncHTTPSession(self.config.proxy) as session:
                     await self._run_session(session)
@@ -42,9 +41,9 @@ class KPTPoller:
                 logger.info("Poller cancelled")
                 break
             except Exception as e:
-                logger.exception(f"Poller error: {e}")
-                logger.info(f"Restarting in {backoff_delay}s...")
-                await asyncio.sleep(backoff_delay)
+                logger.exception("Poller error: %s", e)
+                logger.info("Restarting in %ss...", backoff_delay)
+                await self._wait_or_stop(backoff_delay)
                 backoff_delay = min(backoff_delay * 2, self.config.retry.max_delay)
 
     async def _run_session(self, session: AsyncHTTPSession) -> None:
@@ -56,82 +55,68 @@ class KPTPoller:
 
         await self._recover_buffered_positions(position_queue, writer)
 
-        tasks, ws_client = await self._create_tasks(
-            session, writer, position_queue, dedup
-        )
-
+        ws_client: AsyncWebSocketClient | None = None
         try:
-            await asyncio.gather(*tasks)
-        except asyncio.CancelledError:
-            raise
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self._poll_routes_loop(session, writer))
+
+                if self.config.websocket.enabled:
+                    ws_client = AsyncWebSocketClient(
+                        http_session=session,
+                        ws_config=self.config.websocket,
+                        queue=position_queue,
+                        dedup=dedup,
+                        bounds=self.config.bounds,
+                    )
+                    await ws_client.start()
+                    tg.create_task(
+                        self._flush_positions_loop(position_queue, writer)
+                    )
+
+                tg.create_task(self._stats_loop(position_queue, dedup))
         finally:
-            await self._shutdown_tasks(tasks, ws_client, position_queue, writer)
+            await self._shutdown(ws_client, position_queue, writer)
+
+    async def _wait_or_stop(self, timeout: float) -> bool:
+        """Sleep up to ``timeout`` seconds, waking early on stop().
+
+        Returns True once stop has been requested.
+        """
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self._stop_event.is_set()
 
     async def _recover_buffered_positions(
         self, queue: ConcurrentFileQueue, writer: StreamWriter
     ) -> None:
         recovered = await queue.recover()
         if recovered:
-            await writer.write_positions([p.to_dict() for p in recovered])
-            logger.info(f"Wrote {len(recovered)} recovered positions")
-
-    async def _create_tasks(
-        self,
-        session: AsyncHTTPSession,
-        writer: StreamWriter,
-        position_queue: ConcurrentFileQueue,
-        dedup: DeduplicationFilter,
-    ) -> tuple[list[asyncio.Task[None]], AsyncWebSocketClient | None]:
-        tasks: list[asyncio.Task[None]] = []
-        ws_client: AsyncWebSocketClient | None = None
-
-        tasks.append(asyncio.create_task(self._poll_routes_loop(session, writer)))
-
-        if self.config.websocket.enabled:
-            ws_client = AsyncWebSocketClient(
-                http_session=session,
-                ws_config=self.config.websocket,
-                queue=position_queue,
-                dedup=dedup,
-                bounds=self.config.bounds,
-            )
-            await ws_client.start()
-
-            tasks.append(
-                asyncio.create_task(self._flush_positions_loop(position_queue, writer))
-            )
-
-        tasks.append(asyncio.create_task(self._stats_loop(position_queue, dedup)))
+            await writer.write_positions(recovered)
+            logger.info("Wrote %d recovered positions", len(recovered))
 
-        return tasks, ws_client
-
-    async def _shutdown_tasks(
+    async def _shutdown(
         self,
-        tasks: list[asyncio.Task[None]],
         ws_client: AsyncWebSocketClient | None,
         position_queue: ConcurrentFileQueue,
         writer: StreamWriter,
     ) -> None:
-        for task in tasks:
-            if not task.done():
-                task.cancel()
-        await asyncio.gather(*tasks, return_exceptions=True)
-
         if ws_client is not None:
             await ws_client.stop()
 
         remaining = await position_queue.flush()
         if remaining:
-            await writer.write_positions([p.to_dict() for p in remaining])
+            await writer.write_positions(remaining)
             await position_queue.confirm_flush()
-            logger.info(f"Flushed {len(remaining)} remaining positions on shutdown")
+            logger.info("Flushed %d remaining positions on shutdown", len(remaining))
 
         await writer.close()
 
     def _log_config(self) -> None:
         logger.info("KPT Poller (async, REST API + WebSocket)")
         for key, value in self.config.to_dict().items():
-            logger.info(f"  {key}: {value}")
+            logger.info("  %s: %s", key, value)
 
     async def _poll_routes_loop(
         self, session: AsyncHTTPSession, writer: StreamWriter
@@ -141,93 +126,112 @@ class KPTPoller:
 
         logger.info("Starting routes polling loop...")
 
-        while self._running:
+        while not self._stop_event.is_set():
             self._stats.poll_count += 1
-            timestamp = datetime.now().isoformat()
+            timestamp = iso_timestamp()
             url = self.config.api.routes_url
 
             try:
-                routes = await session.get_json(url)
+                routes = await session.get_json_list(url)
 
                 if routes is None:
                     consecutive_failures += 1
-                    self._stats.record_poll_failure()
+                    self._stats.polls_failed += 1
                     logger.warning(
-                        f"[Poll #{self._stats.poll_count}] Failed "
-                        f"({consecutive_failures}/{max_failures})"
+                        "[Poll #%d] Failed (%d/%d)",
+                        self._stats.poll_count,
+                        consecutive_failures,
+                        max_failures,
                     )
                 else:
                     consecutive_failures = 0
-                    self._stats.record_poll_success()
 
                     record = RouteRecord(
                         timestamp=timestamp,
                         poll_number=self._stats.poll_count,
-                        routes=routes if isinstance(routes, list) else [routes],
+                        routes=routes,
                     )
                     await writer.write_route_record(record)
                     logger.info(
-                        f"[Poll #{self._stats.poll_count}] Fetched {record.route_count} routes"
+                        "[Poll #%d] Fetched %d routes",
+                        self._stats.poll_count,
+                        record.route_count,
                     )
 
             except CookiesExpiredError:
                 consecutive_failures += 1
-                self._stats.record_poll_failure()
+                self._stats.polls_failed += 1
                 logger.warning("Got 403 - refreshing session")
                 await session.refresh_session()
 
             except Exception as e:
                 consecutive_failures += 1
-                self._stats.record_poll_failure()
-                logger.error(f"Poll error: {e}")
+                self._stats.polls_failed += 1
+                logger.error("Poll error: %s", e)
 
             if consecutive_failures >= max_failures:
                 logger.warning("Too many consecutive failures, refreshing session...")
                 await session.refresh_session()
                 consecutive_failures = 0
 
-            await asyncio.sleep(self.config.api.poll_interval)
+            await self._wait_or_stop(self.config.api.poll_interval)
 
     async def _flush_positions_loop(
         self, queue: ConcurrentFileQueue, writer: StreamWriter
     ) -> None:
-        while self._running:
-            await asyncio.sleep(self.config.websocket.flush_interval)
+        flush_interval = self.config.websocket.flush_interval
+
+        while not self._stop_event.is_set():
+            # Flush on the interval, or early if the queue crosses its
+            # watermark during a burst.
+            try:
+                await asyncio.wait_for(
+                    queue.flush_ready.wait(), timeout=flush_interval
+                )
+            except asyncio.TimeoutError:
+                pass
 
             positions = await queue.flush()
             if not positions:
                 continue
 
             try:
-                await writer.write_positions([p.to_dict() for p in positions])
+                await writer.write_positions(positions)
                 await queue.confirm_flush()
-                self._stats.record_position_flush(len(positions))
+                self._stats.ws_flush_count += 1
+                self._stats.total_positions += len(positions)
 
                 logger.info(
-                    f"[WS #{self._stats.ws_flush_count}] Flushed {len(positions)} positions "
-                    f"(total: {self._stats.total_positions})"
+                    "[WS #%d] Flushed %d positions (total: %d)",
+                    self._stats.ws_flush_count,
+                    len(positions),
+                    self._stats.total_positions,
                 )
             except Exception as e:
-                logger.error(f"Failed to write positions: {e}")
+                logger.error("Failed to write positions: %s", e)
 
     async def _stats_loop(
         self, queue: ConcurrentFileQueue, dedup: DeduplicationFilter
     ) -> None:
-        while self._running:
-            await asyncio.sleep(self.config.stats.log_interval)
+        while not self._stop_event.is_set():
+            if await self._wait_or_stop(self.config.stats.log_interval):
+                break
 
             uptime = round(time.monotonic() - self._start_time, 1)
             logger.info(
-                f"Stats: polls={self._stats.poll_count} "
-                f"failed={self._stats.polls_failed} "
-                f"positions={self._stats.total_positions} "
-                f"flushes={self._stats.ws_flush_count} "
-                f"queue={queue.size} dedup={dedup.tracked_count} "
-                f"uptime={uptime}s"
+                "Stats: polls=%d failed=%d positions=%d flushes=%d "
+                "queue=%d dedup=%d uptime=%ss",
+                self._stats.poll_count,
+                self._stats.polls_failed,
+                self._stats.total_positions,
+                self._stats.ws_flush_count,
+                queue.size,
+                dedup.tracked_count,
+                uptime,
             )
 
     def stop(self) -> None:
-        self._running = False
+        self._stop_event.set()
 
 
 async def run_poller(config: PollerConfig) -> None:
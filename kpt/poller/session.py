@@ -5,7 +5,6 @@ import logging
 from typing import TYPE_CHECKING, Any
 
 import aiohttp
-from aiohttp_socks import ProxyConnector
 
 if TYPE_CHECKING:
     from .config import ProxyConfig
@@ -29,17 +28,29 @@ class AsyncHTTPSession:
         self._proxy_config = proxy_config
         self._session: aiohttp.ClientSession | None = None
         self._session_lock = asyncio.Lock()
+        # Fixed at construction: no need to re-derive per request.
+        self._proxy_url = self._get_proxy_url()
+        self._timeouts: dict[int, aiohttp.ClientTimeout] = {}
 
     def _create_connector(self) -> aiohttp.BaseConnector:
         if self._proxy_config.socks_proxy:
+            # Imported lazily: most configs run without a SOCKS proxy.
+            from aiohttp_socks import ProxyConnector
+
             return ProxyConnector.from_url(self._proxy_config.socks_proxy)
-        return aiohttp.TCPConnector()
+        return aiohttp.TCPConnector(limit_per_host=8, keepalive_timeout=75)
 
     def _get_proxy_url(self) -> str | None:
         if self._proxy_config.http_proxy and not self._proxy_config.socks_proxy:
             return self._proxy_config.http_proxy
         return None
 
+    def _timeout(self, seconds: int) -> aiohttp.ClientTimeout:
+        timeout = self._timeouts.get(seconds)
+        if timeout is None:
+            timeout = self._timeouts[seconds] = aiohttp.ClientTimeout(total=seconds)
+        return timeout
+
     async def _ensure_session(self) -> aiohttp.ClientSession:
         if self._session is None or self._session.closed:
             connector = self._create_connector()
@@ -48,11 +59,10 @@ class AsyncHTTPSession:
 
     async def get_json(self, url: str, timeout: int = 30) -> dict | list | None:
         session = await self._ensure_session()
-        proxy = self._get_proxy_url()
 
         try:
             async with session.get(
-                url, timeout=aiohttp.ClientTimeout(total=timeout), proxy=proxy
+                url, timeout=self._timeout(timeout), proxy=self._proxy_url
             ) as response:
                 if response.status == 403:
                     raise CookiesExpiredError()
@@ -76,13 +86,19 @@ class AsyncHTTPSession:
             logger.warning(f"Connection error for {url}: {e}")
             return None
 
+    async def get_json_list(self, url: str, timeout: int = 30) -> list[Any] | None:
+        """Fetch JSON normalized to a list, so callers skip per-call isinstance checks."""
+        data = await self.get_json(url, timeout)
+        if data is None:
+            return None
+        return data if isinstance(data, list) else [data]
+
     async def get_text(self, url: str, timeout: int = 30) -> str | None:
         session = await self._ensure_session()
-        proxy = self._get_proxy_url()
 
         try:
             async with session.get(
-                url, timeout=aiohttp.ClientTimeout(total=timeout), proxy=proxy
+                url, timeout=self._timeout(timeout), proxy=self._proxy_url
             ) as response:
                 if response.status == 403:
                     raise CookiesExpiredError()
@@ -1,16 +1,17 @@
 from __future__ import annotations
 
 import asyncio
-import json
 import logging
 import os
 import time
 from collections import deque
 from dataclasses import dataclass
 from pathlib import Path
-from typing import TYPE_CHECKING, Any
+from typing import TYPE_CHECKING, Any, BinaryIO
+from urllib.parse import urlsplit
 
 import aiohttp
+import orjson
 
 from .models import VehiclePosition, WebSocketStats
 from .parsers import MessageParser, parse_handshake_response
@@ -21,14 +22,25 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Bound once: the receive loop stamps every frame.
+_now = time.time
+
 
 class ConcurrentFileQueue:
     def __init__(self, buffer_dir: Path, config: QueueConfig) -> None:
         self._buffer_path = buffer_dir / config.buffer_file
         self._processing_path = buffer_dir / (config.buffer_file + ".processing")
         self._max_size = config.max_size
+        self._watermark = max(1, config.max_size // 2)
         self._queue: deque[VehiclePosition] = deque(maxlen=config.max_size)
         self._lock = asyncio.Lock()
+        self._flush_ready = asyncio.Event()
+        self._buffer_handle: BinaryIO | None = None
+
+    @property
+    def flush_ready(self) -> asyncio.Event:
+        """Set once the queue crosses its watermark; cleared by flush()."""
+        return self._flush_ready
 
     async def recover(self) -> list[VehiclePosition]:
         recovered: list[VehiclePosition] = []
@@ -37,49 +49,82 @@ class ConcurrentFileQueue:
                 continue
 
             try:
-                with open(path, "r") as f:
+                with open(path, "rb") as f:
                     for line in f:
                         line = line.strip()
                         if not line:
                             continue
 
-                        data = json.loads(line)
+                        data = orjson.loads(line)
                         recovered.append(VehiclePosition.from_dict(data))
 
                 os.remove(path)
-                logger.info(f"Recovered {len(recovered)} positions from {path.name}")
-            except (json.JSONDecodeError, KeyError, OSError) as e:
-                logger.warning(f"Error recovering from {path}: {e}")
+                logger.info("Recovered %d positions from %s", len(recovered), path.name)
+            except (orjson.JSONDecodeError, KeyError, OSError) as e:
+                logger.warning("Error recovering from %s: %s", path, e)
 
         return recovered
 
+    def _ensure_buffer_handle(self) -> BinaryIO:
+        """Keep one open handle instead of an open/close pair per append."""
+        if self._buffer_handle is None or self._buffer_handle.closed:
+            self._buffer_handle = open(self._buffer_path, "ab")
+        return self._buffer_handle
+
+    def _close_buffer_handle(self) -> None:
+        if self._buffer_handle is not None and not self._buffer_handle.closed:
+            self._buffer_handle.close()
+        self._buffer_handle = None
+
     async def append(self, position: VehiclePosition) -> None:
         async with self._lock:
             if len(self._queue) >= self._max_size:
-                logger.warning(
-                    f"Queue full ({self._max_size}), dropping oldest position"
-                )
+                logger.warning("Queue full (%d), dropping oldest position", self._max_size)
             self._queue.append(position)
+            if len(self._queue) >= self._watermark:
+                self._flush_ready.set()
+
+            try:
+                fh = self._ensure_buffer_handle()
+                fh.write(orjson.dumps(position) + b"\n")
+                fh.flush()
+            except OSError as e:
+                logger.error("Failed to write to buffer file: %s", e)
+
+    async def append_many(self, positions: list[VehiclePosition]) -> None:
+        """Enqueue a batch under one lock acquisition and one buffer write."""
+        async with self._lock:
+            if len(self._queue) + len(positions) > self._max_size:
+                logger.warning("Queue full (%d), dropping oldest positions", self._max_size)
+            self._queue.extend(positions)
+            if len(self._queue) >= self._watermark:
+                self._flush_ready.set()
 
             try:
-                with open(self._buffer_path, "a") as f:
-                    f.write(json.dumps(position.to_dict()) + "\n")
+                fh = self._ensure_buffer_handle()
+                fh.write(b"".join(orjson.dumps(p) + b"\n" for p in positions))
+                fh.flush()
             except OSError as e:
-                logger.error(f"Failed to write to buffer file: {e}")
+                logger.error("Failed to write to buffer file: %s", e)
 
     async def flush(self) -> list[VehiclePosition]:
         async with self._lock:
+            self._flush_ready.clear()
             if not self._queue:
                 return []
 
-            positions = list(self._queue)
-            self._queue.clear()
+            # Swap the deque out wholesale; one pass to build the result
+            # list instead of copy-then-clear.
+            drained = self._queue
+            self._queue = deque(maxlen=self._max_size)
+            positions = list(drained)
 
             try:
+                self._close_buffer_handle()
                 if self._buffer_path.exists():
                     self._buffer_path.rename(self._processing_path)
             except OSError as e:
-                logger.warning(f"Failed to rename buffer file: {e}")
+                logger.warning("Failed to rename buffer file: %s", e)
 
             return positions
 
@@ -88,7 +133,7 @@ class ConcurrentFileQueue:
             if self._processing_path.exists():
                 os.remove(self._processing_path)
         except OSError as e:
-            logger.warning(f"Failed to remove processing file: {e}")
+            logger.warning("Failed to remove processing file: %s", e)
 
     @property
     def size(self) -> int:
@@ -96,36 +141,40 @@ class ConcurrentFileQueue:
 
 
 class DeduplicationFilter:
+    """Generational dedup: two key sets swapped every TTL.
+
+    Keys live between one and two TTLs, membership checks are O(1), and
+    expiry is a constant-time set swap instead of scanning every entry.
+    """
+
     def __init__(self, ttl: float = 60.0) -> None:
         self._ttl = ttl
-        self._seen: dict[tuple[int, int], float] = {}
-        self._last_cleanup = time.monotonic()
-        self._cleanup_interval = 30.0
+        self._current: set[int] = set()
+        self._previous: set[int] = set()
+        self._next_swap = time.monotonic() + ttl
 
     def is_duplicate(self, position: VehiclePosition) -> bool:
         now = time.monotonic()
-        if now - self._last_cleanup > self._cleanup_interval:
-            self._cleanup(now)
-
-        key = (position.vehicle_id, position.timestamp)
-        if key in self._seen:
+        if now >= self._next_swap:
+            self._previous = self._current
+            self._current = set()
+            self._next_swap = now + self._ttl
+
+        # Pack (vehicle_id, timestamp) into one int: a single small key to
+        # hash and store instead of a tuple plus two boxed ints.
+        key = (position.vehicle_id << 32) | (position.timestamp & 0xFFFFFFFF)
+        if key in self._current or key in self._previous:
             return True
 
-        self._seen[key] = now + self._ttl
+        self._current.add(key)
         return False
 
-    def _cleanup(self, now: float) -> None:
-        expired = [k for k, expiry in self._seen.items() if expiry <= now]
-        for k in expired:
-            del self._seen[k]
-        self._last_cleanup = now
-
     @property
     def tracked_count(self) -> int:
-        return len(self._seen)
+        return len(self._current) + len(self._previous)
 
 
-@dataclass
+@dataclass(slots=True)
 class ConnectionContext:
     session_id: str
     ping_interval: int
@@ -147,6 +196,15 @@ class AsyncWebSocketClient:
         self._dedup = dedup
         self._parser = MessageParser(bounds)
         self._stats = WebSocketStats()
+        self._ws_headers = {"Origin": ws_config.base_url}
+
+        # URL shapes are fixed by config; build them once so reconnect
+        # attempts only substitute the session id.
+        host = urlsplit(ws_config.base_url).netloc
+        self._handshake_url = f"{ws_config.base_url}/socket.io/?EIO=3&transport=polling"
+        self._ws_url_template = (
+            f"wss://{host}/socket.io/?EIO=3&transport=websocket&sid={{}}"
+        )
 
         self._running = False
         self._task: asyncio.Task[None] | None = None
@@ -172,7 +230,8 @@ class AsyncWebSocketClient:
                 pass
 
         logger.info(
-            f"WebSocket client stopped (total positions: {self._stats.position_count})"
+            "WebSocket client stopped (total positions: %d)",
+            self._stats.position_count,
         )
 
     @property
@@ -190,29 +249,22 @@ class AsyncWebSocketClient:
         }
 
     async def _perform_handshake(self) -> ConnectionContext | None:
-        handshake_url = f"{self._config.base_url}/socket.io/?EIO=3&transport=polling"
-
         try:
-            logger.info(f"Socket.IO handshake: {handshake_url}")
-            text = await self._http_session.get_text(handshake_url)
+            logger.info("Socket.IO handshake: %s", self._handshake_url)
+            text = await self._http_session.get_text(self._handshake_url)
             if text is None:
                 logger.error("Handshake failed: no response")
                 return None
 
             session_id, ping_interval = parse_handshake_response(text)
             if not session_id:
-                logger.error(f"Could not parse session ID from: {text[:100]}")
+                logger.error("Could not parse session ID from: %s", text[:100])
                 return None
 
             ping_seconds = (ping_interval or 25000) // 1000
-            logger.info(f"Got session ID: {session_id[:20]}... (ping: {ping_seconds}s)")
+            logger.info("Got session ID: %s... (ping: %ds)", session_id[:20], ping_seconds)
 
-            ws_host = self._config.base_url.replace("https://", "").replace(
-                "http://", ""
-            )
-            ws_url = (
-                f"wss://{ws_host}/socket.io/?EIO=3&transport=websocket&sid={session_id}"
-            )
+            ws_url = self._ws_url_template.format(session_id)
 
             return ConnectionContext(
                 session_id=session_id,
@@ -221,44 +273,40 @@ class AsyncWebSocketClient:
             )
 
         except Exception as e:
-            logger.error(f"Handshake error: {e}")
+            logger.error("Handshake error: %s", e)
             return None
 
     async def _connect_websocket(self, context: ConnectionContext) -> bool:
         session = await self._http_session._ensure_session()
-        proxy = self._http_session._get_proxy_url()
 
         try:
             self._ws = await session.ws_connect(
                 context.ws_url,
-                proxy=proxy,
-                headers={
-                    "Origin": self._config.base_url,
-                },
+                proxy=self._http_session._proxy_url,
+                headers=self._ws_headers,
             )
             return True
         except Exception as e:
-            logger.error(f"WebSocket connection error: {e}")
+            logger.error("WebSocket connection error: %s", e)
             return False
 
     async def _handle_protocol_message(self, message: str) -> bool:
         assert self._ws is not None
 
-        if message == "3probe":
-            logger.info("Received probe response, completing upgrade...")
-            await self._ws.send_str("5")
-            await self._ws.send_str("40")
-            self._stats.connected = True
-            logger.info("WebSocket upgrade complete")
-            return True
+        packet_type = message[0]
 
-        if not message:
+        if packet_type == "4":  # data frames dominate; skip protocol compares
             return False
 
-        packet_type = message[0]
-
-        if packet_type == "3":  # PONG
-            logger.debug("Received PONG")
+        if packet_type == "3":  # PONG, or the upgrade probe reply
+            if message == "3probe":
+                logger.info("Received probe response, completing upgrade...")
+                await self._ws.send_str("5")
+                await self._ws.send_str("40")
+                self._stats.connected = True
+                logger.info("WebSocket upgrade complete")
+            else:
+                logger.debug("Received PONG")
             return True
 
         if packet_type == "2":  # PING from server
@@ -277,59 +325,56 @@ class AsyncWebSocketClient:
         if await self._handle_protocol_message(message):
             return
 
-        if self._stats.message_count <= 10:
-            logger.info(f"WS message #{self._stats.message_count}: {message[:100]}")
+        count = self._stats.message_count
+        if count <= 10 and logger.isEnabledFor(logging.INFO):
+            logger.info("WS message #%d: %s", count, message[:100])
 
         positions = self._parser.parse(message)
-        for pos in positions:
-            if not self._dedup.is_duplicate(pos):
-                await self._queue.append(pos)
-                self._stats.position_count += 1
-
-        if self._stats.message_count % 100 == 0:
+        if positions:
+            is_duplicate = self._dedup.is_duplicate
+            batch = [p for p in positions if not is_duplicate(p)]
+            if batch:
+                await self._queue.append_many(batch)
+                self._stats.position_count += len(batch)
+
+        if not count & 0xFF:  # every 256 messages; & is one bytecode, % is not
             logger.debug(
-                f"WS messages: {self._stats.message_count}, "
-                f"positions: {self._stats.position_count}"
+                "WS messages: %d, positions: %d", count, self._stats.position_count
             )
 
-    async def _receive_loop(self, ping_interval: int) -> None:
+    async def _keepalive_loop(self, ping_interval: int) -> None:
         assert self._ws is not None
-        last_ping = time.monotonic()
-
         while self._running and not self._ws.closed:
-            try:
-                msg = await asyncio.wait_for(self._ws.receive(), timeout=ping_interval)
-            except asyncio.TimeoutError:
-                if self._stats.connected:
-                    try:
-                        await self._ws.send_str("2")
-                        last_ping = time.monotonic()
-                        logger.debug("Sent PING")
-                    except Exception:
-                        break
+            await asyncio.sleep(ping_interval)
+            if not self._stats.connected:
                 continue
-
-            if msg.type == aiohttp.WSMsgType.TEXT:
-                await self._handle_message(msg.data)
-                self._stats.last_update = time.time()
-            elif msg.type in (
-                aiohttp.WSMsgType.CLOSED,
-                aiohttp.WSMsgType.CLOSING,
-                aiohttp.WSMsgType.ERROR,
-            ):
-                logger.info(f"WebSocket closed: {msg.type}")
+            try:
+                await self._ws.send_str("2")
+                logger.debug("Sent PING")
+            except Exception:
                 break
 
-            now = time.monotonic()
-            if self._stats.connected and now - last_ping > ping_interval:
-                try:
-                    await self._ws.send_str("2")
-                    last_ping = now
-                    logger.debug("Sent PING")
-                except Exception:
-                    break
+    async def _receive_loop(self, ping_interval: int) -> None:
+        assert self._ws is not None
+        keepalive = asyncio.create_task(self._keepalive_loop(ping_interval))
 
-        self._stats.connected = False
+        try:
+            while self._running and not self._ws.closed:
+                msg = await self._ws.receive()
+
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    await self._handle_message(msg.data)
+                    self._stats.last_update = _now()
+                elif msg.type in (
+                    aiohttp.WSMsgType.CLOSED,
+                    aiohttp.WSMsgType.CLOSING,
+                    aiohttp.WSMsgType.ERROR,
+                ):
+                    logger.info("WebSocket closed: %s", msg.type)
+                    break
+        finally:
+            keepalive.cancel()
+            self._stats.connected = False
 
     async def _run_loop(self) -> None:
         delay = self._config.reconnect_delay
@@ -338,7 +383,7 @@ class AsyncWebSocketClient:
             try:
                 context = await self._perform_handshake()
                 if not context:
-                    logger.warning(f"WS connection failed, retrying in {delay}s")
+                    logger.warning("WS connection failed, retrying in %ds", delay)
                     await asyncio.sleep(delay)
                     delay = min(delay * 2, 300)
                     continue
@@ -360,7 +405,8 @@ class AsyncWebSocketClient:
                     break
 
                 logger.info(
-                    f"WS connection lost, reconnecting in {self._config.reconnect_delay}s"
+                    "WS connection lost, reconnecting in %ds",
+                    self._config.reconnect_delay,
                 )
                 await asyncio.sleep(self._config.reconnect_delay)
 
@@ -368,7 +414,7 @@ class AsyncWebSocketClient:
                 break
 
             except Exception as e:
-                logger.error(f"WS client error: {e}")
+                logger.error("WS client error: %s", e)
                 self._stats.error_count += 1
                 await asyncio.sleep(delay)
                 delay = min(delay * 2, 300)
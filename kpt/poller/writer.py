@@ -1,16 +1,17 @@
 from __future__ import annotations
 
-import json
 import logging
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
 import aiofiles
+import orjson
 
 if TYPE_CHECKING:
     from .config import OutputConfig
-    from .models import RouteRecord
+    from .models import RouteRecord, VehiclePosition
 
 logger = logging.getLogger(__name__)
 
@@ -19,43 +20,87 @@ def get_current_date() -> str:
     return datetime.now().strftime("%Y%m%d")
 
 
+_iso_cache: tuple[int, str] = (0, "")
+
+
+def iso_timestamp() -> str:
+    """Current local time in ISO format, recomputed only when the second rolls over."""
+    global _iso_cache
+    second = int(time.time())
+    if second != _iso_cache[0]:
+        _iso_cache = (second, datetime.fromtimestamp(second).isoformat())
+    return _iso_cache[1]
+
+
 def build_file_path(output_dir: Path, prefix: str, date: str, extension: str) -> Path:
     return output_dir / f"{prefix}_{date}{extension}"
 
 
 class RotatingFileHandle:
+    # Pending lines are flushed to disk once they exceed this many bytes,
+    # so frequent small records cost one syscall per batch, not per line.
+    BUFFER_LIMIT = 64 * 1024
+
     def __init__(self, output_dir: Path, prefix: str, extension: str = ".jsonl") -> None:
         self.output_dir = output_dir
         self.prefix = prefix
         self.extension = extension
         self._current_date: str = ""
-        self._handle: aiofiles.threadpool.text.AsyncTextIOWrapper | None = None
+        self._cached_date: str = ""
+        self._date_deadline: float = 0.0
+        self._handle: aiofiles.threadpool.binary.AsyncBufferedIOBase | None = None
+        self._pending: list[bytes] = []
+        self._pending_bytes = 0
 
     def _should_rotate(self) -> bool:
-        return get_current_date() != self._current_date
+        # The date string can only change once a day; re-derive it at most
+        # once a second instead of per write.
+        now = time.monotonic()
+        if now >= self._date_deadline:
+            self._cached_date = get_current_date()
+            self._date_deadline = now + 1.0
+        return self._cached_date != self._current_date
 
     async def _rotate(self) -> None:
         if self._handle:
+            await self.flush()
             await self._handle.close()
 
-        self._current_date = get_current_date()
+        self._current_date = self._cached_date or get_current_date()
         file_path = build_file_path(
             self.output_dir, self.prefix, self._current_date, self.extension
         )
 
-        self._handle = await aiofiles.open(file_path, "a", encoding="utf-8")
+        self._handle = await aiofiles.open(file_path, "ab")
         logger.info(f"Writing to: {file_path}")
 
     async def write(self, data: dict[str, Any]) -> None:
+        await self.write_serialized(orjson.dumps(data) + b"\n")
+
+    async def write_serialized(self, line: bytes) -> None:
+        """Buffer an already-encoded JSONL line, flushing past the high-water mark."""
         if self._should_rotate():
             await self._rotate()
 
+        self._pending.append(line)
+        self._pending_bytes += len(line)
+        if self._pending_bytes >= self.BUFFER_LIMIT:
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self._pending:
+            return
+
         assert self._handle is not None
-        await self._handle.write(json.dumps(data, ensure_ascii=False) + "\n")
+        data = b"".join(self._pending)
+        self._pending.clear()
+        self._pending_bytes = 0
+        await self._handle.write(data)
         await self._handle.flush()
 
     async def close(self) -> None:
         if self._handle:
+            await self.flush()
             await self._handle.close()
             self._handle = None
 
@@ -79,17 +124,23 @@ class StreamWriter:
     async def write_routes(self, data: dict[str, Any]) -> None:
         await self._routes_file.write(data)
 
-    async def write_positions(self, positions: list[dict[str, Any]]) -> None:
+    async def write_positions(self, positions: list[VehiclePosition]) -> None:
         if not positions:
             return
 
+        # orjson serializes the dataclasses natively, so the whole batch
+        # becomes one line of bytes without a per-position to_dict() pass.
         record = {
             "collected_by": "Aleksieienko",
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": iso_timestamp(),
             "count": len(positions),
             "positions": positions,
         }
-        await self._positions_file.write(record)
+        line = orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+        await self._positions_file.write_serialized(line)
+        # The caller drops its crash buffer (confirm_flush) as soon as we
+        # return, so positions must be on disk by then.
+        await self._positions_file.flush()
 
     async def write_route_record(self, record: RouteRecord) -> None:
         await self.write_routes(record.to_dict())
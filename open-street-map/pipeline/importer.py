@@ -1,13 +1,17 @@
+import io
 import json
 import logging
+import threading
 import time
-import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import asdict, dataclass
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
+import orjson
 import requests
+from lxml import etree
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +21,7 @@ OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 REQUEST_TIMEOUT_SECONDS = 120
 QUERY_TIMEOUT_SECONDS = 90
 REQUEST_DELAY_SECONDS = 1.5
+OVERPASS_CONCURRENT_SLOTS = 2
 DEFAULT_OUTPUT_DIR = Path(__file__).parent.parent / "data"
 OSM_XML_VERSION = 0.6
 
@@ -78,6 +83,21 @@ def build_query_body(filters: list[OsmFilter]) -> str:
     return "(\n" + "\n".join(lines) + "\n)"
 
 
+# The filter sets above are module constants, so their query bodies are
+# too: build every body once at import and let the fetch methods just
+# index a dict.
+_COMPILED_BODIES = {
+    name: build_query_body(filters) for name, filters in OSM_FILTERS.items()
+}
+_ROAD_NETWORK_BODY = OsmFilter.with_pattern(
+    "way", "highway", "|".join(DEFAULT_HIGHWAY_TYPES)
+)
+_LANDUSE_BODY = f"""(
+        {OsmFilter.with_pattern("way", "landuse", LANDUSE_TYPES)};
+        {OsmFilter.with_pattern("relation", "landuse", LANDUSE_TYPES)};
+    )"""
+
+
 @dataclass
 class OSMResponse:
     elements: list[dict[str, Any]]
@@ -94,8 +114,10 @@ class OverpassQueryBuilder:
         self.bbox_str = bbox_str
         self.timeout = timeout
 
-    def build(self, body: str, include_geometry: bool = True) -> str:
-        header = f"[out:json][timeout:{self.timeout}][bbox:{self.bbox_str}];"
+    def build(
+        self, body: str, include_geometry: bool = True, output: str = "json"
+    ) -> str:
+        header = f"[out:{output}][timeout:{self.timeout}][bbox:{self.bbox_str}];"
         footer = "out body;\n>;\nout skel qt;" if include_geometry else "out body;"
         return f"{header}\n{body}\n{footer}"
 
@@ -105,9 +127,14 @@ class OSMImporter:
         self.bbox = bbox or KYIV_BOUNDS
         self.session = requests.Session()
         self.session.headers.update(
-            {"User-Agent": "KyivTrafficAnalysis/1.0 (research project)"}
+            {
+                "User-Agent": "KyivTrafficAnalysis/1.0 (research project)",
+                # Overpass responses compress ~5x; ask for it explicitly.
+                "Accept-Encoding": "gzip, br",
+            }
         )
         self._last_request_time = 0.0
+        self._rate_lock = threading.Lock()
         self._query_builder = OverpassQueryBuilder(self._build_bbox_str())
 
     def _build_bbox_str(self) -> str:
@@ -115,9 +142,13 @@ class OSMImporter:
         return f"{south},{west},{north},{east}"
 
     def _rate_limit(self) -> None:
-        elapsed = time.time() - self._last_request_time
-        if elapsed < REQUEST_DELAY_SECONDS:
-            time.sleep(REQUEST_DELAY_SECONDS - elapsed)
+        # Serialized under a lock so concurrent fetches still keep the
+        # required gap between request dispatches.
+        with self._rate_lock:
+            wait = self._last_request_time + REQUEST_DELAY_SECONDS - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_request_time = time.time()
 
     def _execute_query(self, overpass_query: str) -> OSMResponse:
         self._rate_limit()
@@ -133,8 +164,9 @@ class OSMImporter:
             logger.error(f"Overpass API request failed: {err}")
             raise
 
-        self._last_request_time = time.time()
-        data = response.json()
+        # response.content is already bytes; orjson parses it ~3x faster
+        # than the stdlib decoder behind response.json().
+        data = orjson.loads(response.content)
 
         return OSMResponse(
             elements=data.get("elements", []),
@@ -143,74 +175,100 @@ class OSMImporter:
             generator=data.get("generator", ""),
         )
 
+    def _execute_query_streamed(self, overpass_query: str) -> OSMResponse:
+        """Run an [out:xml] query, parsing the body as it streams in.
+
+        The decompressed response pipes straight into the XML parser, so
+        a 50 MB payload never exists as one Python string.
+        """
+        self._rate_limit()
+
+        try:
+            response = self.session.post(
+                OVERPASS_URL,
+                data={"data": overpass_query},
+                timeout=REQUEST_TIMEOUT_SECONDS,
+                stream=True,
+            )
+            response.raise_for_status()
+        except requests.RequestException as err:
+            logger.error(f"Overpass API request failed: {err}")
+            raise
+
+        response.raw.decode_content = True
+        elements = _parse_xml_stream(response.raw)
+
+        return OSMResponse(
+            elements=elements,
+            timestamp="",
+            version=OSM_XML_VERSION,
+            generator="xml_parser",
+        )
+
     def fetch_road_network(self, highway_types: list[str] | None = None) -> OSMResponse:
-        types = highway_types or DEFAULT_HIGHWAY_TYPES
-        pattern = "|".join(types)
-        body = OsmFilter.with_pattern("way", "highway", pattern)
+        if highway_types:
+            body = OsmFilter.with_pattern("way", "highway", "|".join(highway_types))
+        else:
+            body = _ROAD_NETWORK_BODY
         query = self._query_builder.build(body)
         return self._execute_query(query)
 
     def fetch_road_narrowing(self) -> OSMResponse:
-        body = build_query_body(OSM_FILTERS["road_narrowing"])
-        query = self._query_builder.build(body)
+        query = self._query_builder.build(_COMPILED_BODIES["road_narrowing"])
         return self._execute_query(query)
 
     def fetch_landuse_zones(self) -> OSMResponse:
-        body = f"""(
-                {OsmFilter.with_pattern("way", "landuse", LANDUSE_TYPES)};
-                {OsmFilter.with_pattern("relation", "landuse", LANDUSE_TYPES)};
-            )"""
-
-        query = self._query_builder.build(body)
+        query = self._query_builder.build(_LANDUSE_BODY)
         return self._execute_query(query)
 
     def fetch_elevation_data(self) -> OSMResponse:
-        body = build_query_body(OSM_FILTERS["elevation"])
-        query = self._query_builder.build(body)
+        query = self._query_builder.build(_COMPILED_BODIES["elevation"])
         return self._execute_query(query)
 
     def fetch_traffic_signals(self) -> OSMResponse:
-        body = build_query_body(OSM_FILTERS["traffic_signals"])
-        query = self._query_builder.build(body, include_geometry=False)
+        query = self._query_builder.build(
+            _COMPILED_BODIES["traffic_signals"], include_geometry=False
+        )
         return self._execute_query(query)
 
     def fetch_pedestrian_crossings(self) -> OSMResponse:
-        body = build_query_body(OSM_FILTERS["pedestrian"])
-        query = self._query_builder.build(body)
+        query = self._query_builder.build(_COMPILED_BODIES["pedestrian"])
         return self._execute_query(query)
 
     def fetch_all(self) -> dict[str, OSMResponse]:
-        return {
-            "road_network": self.fetch_road_network(),
-            "narrowing": self.fetch_road_narrowing(),
-            "landuse": self.fetch_landuse_zones(),
-            "elevation": self.fetch_elevation_data(),
-            "traffic_signals": self.fetch_traffic_signals(),
-            "pedestrian_crossings": self.fetch_pedestrian_crossings(),
+        # Overpass allows a couple of concurrent slots per IP and the
+        # cost is server-side compute, so two in-flight queries roughly
+        # halve total wall time; _rate_limit still spaces the dispatches.
+        jobs = {
+            "road_network": self.fetch_road_network,
+            "narrowing": self.fetch_road_narrowing,
+            "landuse": self.fetch_landuse_zones,
+            "elevation": self.fetch_elevation_data,
+            "traffic_signals": self.fetch_traffic_signals,
+            "pedestrian_crossings": self.fetch_pedestrian_crossings,
         }
+        with ThreadPoolExecutor(max_workers=OVERPASS_CONCURRENT_SLOTS) as pool:
+            futures = {name: pool.submit(fetch) for name, fetch in jobs.items()}
+            return {name: future.result() for name, future in futures.items()}
 
     def to_geojson(self, response: OSMResponse) -> dict[str, Any]:
+        # Single comprehension with the node check inlined: two method
+        # calls per element add up on million-element responses.
         features = [
-            self._node_to_geojson_feature(elem)
+            {
+                "type": "Feature",
+                "id": elem.get("id"),
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [elem["lon"], elem["lat"]],
+                },
+                "properties": elem.get("tags", {}),
+            }
             for elem in response.elements
-            if self._is_valid_node(elem)
+            if elem.get("type") == "node" and "lat" in elem and "lon" in elem
         ]
         return {"type": "FeatureCollection", "features": features}
 
-    def _is_valid_node(self, element: dict[str, Any]) -> bool:
-        return element.get("type") == "node" and "lat" in element and "lon" in element
-
-    def _node_to_geojson_feature(self, node: dict[str, Any]) -> dict[str, Any]:
-        return {
-            "type": "Feature",
-            "id": node.get("id"),
-            "geometry": {
-                "type": "Point",
-                "coordinates": [node["lon"], node["lat"]],
-            },
-            "properties": node.get("tags", {}),
-        }
-
     def save_response(
         self,
         response: OSMResponse,
@@ -231,8 +289,9 @@ class OSMImporter:
             else response.to_dict()
         )
 
-        with open(filepath, "w", encoding="utf-8") as file:
-            json.dump(data, file, ensure_ascii=False, indent=2)
+        # orjson serializes straight to UTF-8 bytes, several times faster
+        # than stdlib json.dump on the larger Overpass responses.
+        filepath.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
 
         logger.info(f"Saved {filepath} ({len(response.elements)} elements)")
         return filepath
@@ -255,7 +314,7 @@ class OSMImporter:
         return self.save_all(data, output_dir)
 
 
-def _parse_node(node: ET.Element) -> dict[str, Any]:
+def _parse_node(node: etree._Element) -> dict[str, Any]:
     return {
         "type": "node",
         "id": int(node.get("id", 0)),
@@ -265,7 +324,7 @@ def _parse_node(node: ET.Element) -> dict[str, Any]:
     }
 
 
-def _parse_way(way: ET.Element) -> dict[str, Any]:
+def _parse_way(way: etree._Element) -> dict[str, Any]:
     return {
         "type": "way",
         "id": int(way.get("id", 0)),
@@ -274,7 +333,7 @@ def _parse_way(way: ET.Element) -> dict[str, Any]:
     }
 
 
-def _parse_relation(relation: ET.Element) -> dict[str, Any]:
+def _parse_relation(relation: etree._Element) -> dict[str, Any]:
     members = [
         {
             "type": member.get("type"),
@@ -291,21 +350,39 @@ def _parse_relation(relation: ET.Element) -> dict[str, Any]:
     }
 
 
-def parse_xml_to_json(xml_content: str | bytes) -> dict[str, Any]:
-    if isinstance(xml_content, bytes):
-        xml_content = xml_content.decode("utf-8")
+def _parse_xml_stream(source: Any) -> list[dict[str, Any]]:
+    # Stream the document in one pass instead of materializing the full
+    # DOM and walking it three times. The tag filter makes lxml skip
+    # sub-elements of other types in C; clearing each handled element
+    # and dropping processed siblings keeps memory bounded regardless of
+    # dump size.
+    elements = []
+    for _event, elem in etree.iterparse(
+        source, events=("end",), tag=("node", "way", "relation")
+    ):
+        tag = elem.tag
+        if tag == "node":
+            elements.append(_parse_node(elem))
+        elif tag == "way":
+            elements.append(_parse_way(elem))
+        else:
+            elements.append(_parse_relation(elem))
 
-    root = ET.fromstring(xml_content)
+        elem.clear(keep_tail=True)
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
 
-    elements = []
-    elements.extend(_parse_node(node) for node in root.findall(".//node"))
-    elements.extend(_parse_way(way) for way in root.findall(".//way"))
-    elements.extend(_parse_relation(rel) for rel in root.findall(".//relation"))
+    return elements
+
+
+def parse_xml_to_json(xml_content: str | bytes) -> dict[str, Any]:
+    if isinstance(xml_content, str):
+        xml_content = xml_content.encode("utf-8")
 
     return {
         "version": OSM_XML_VERSION,
         "generator": "xml_parser",
-        "elements": elements,
+        "elements": _parse_xml_stream(io.BytesIO(xml_content)),
     }
 
 